@@ -2,70 +2,80 @@
 Database CRUD operations.
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, select, text, Date, DateTime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import date, datetime, timedelta
 from typing import List, Optional
 from app.models import SensorReading, DailyPrediction
-from app.schemas import SensorReadingCreate
+from app.schemas import SensorReadingResponse, DailyPredictionResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Single-row lookups for the dashboard, bypassing ORM object loading.
+# id is the monotonic primary key, so ORDER BY id DESC LIMIT 1 reads the
+# last entry of the table B-tree directly, with no index lookup or sort.
+# Predictions are written once per day in date order (re-runs for a day
+# UPSERT in place and keep their id), so the newest id is the latest date.
+_LATEST_READING_SQL = text(
+    "SELECT id, ph, tds, turbidity, temperature, timestamp "
+    "FROM sensor_readings ORDER BY id DESC LIMIT 1"
+).columns(timestamp=DateTime)
 
-def create_sensor_reading(db: Session, reading: SensorReadingCreate) -> SensorReading:
+_LATEST_PREDICTION_SQL = text(
+    "SELECT id, date, avg_ph, avg_tds, avg_turbidity, avg_temperature, "
+    "prediction, prediction_confidence, reading_count, created_at "
+    "FROM daily_predictions ORDER BY id DESC LIMIT 1"
+).columns(date=Date, created_at=DateTime)
+
+# Incremented after every committed write that can change what the
+# dashboard shows, so cached responses know when they are stale
+_data_generation = 0
+
+
+def get_data_generation() -> int:
+    """
+    Get the current write generation for sensor/prediction data.
+    """
+    return _data_generation
+
+
+def _bump_data_generation():
+    global _data_generation
+    _data_generation += 1
+
+
+def create_sensor_readings(db: Session, readings: List[dict]) -> int:
     """
-    Create new sensor reading in database.
+    Insert a batch of sensor readings with a single commit.
     
     Args:
         db: Database session
-        reading: Sensor data from ESP32
+        readings: Dicts with ph, tds, turbidity, temperature and timestamp
         
     Returns:
-        Created SensorReading object
+        Number of readings inserted
     """
-    db_reading = SensorReading(
-        ph=reading.ph,
-        tds=reading.tds,
-        turbidity=reading.turbidity,
-        temperature=reading.temperature
-    )
-    db.add(db_reading)
+    # executemany under one transaction: one fsync for the whole batch
+    db.execute(insert(SensorReading), readings)
     db.commit()
-    db.refresh(db_reading)
-    logger.info(f"Created sensor reading: {db_reading.id}")
-    return db_reading
+    _bump_data_generation()
+    logger.info("Stored batch of %d sensor readings", len(readings))
+    return len(readings)
 
 
-def get_latest_sensor_reading(db: Session) -> Optional[SensorReading]:
+def get_latest_sensor_reading(db: Session) -> Optional[SensorReadingResponse]:
     """
     Get the most recent sensor reading.
     
     Returns:
-        Latest SensorReading or None
-    """
-    return db.query(SensorReading).order_by(SensorReading.timestamp.desc()).first()
-
-
-def get_readings_for_date(db: Session, target_date: date) -> List[SensorReading]:
+        Latest reading as SensorReadingResponse or None
     """
-    Get all sensor readings for a specific date.
-    
-    Args:
-        target_date: Date to query
-        
-    Returns:
-        List of SensorReading objects
-    """
-    start_datetime = datetime.combine(target_date, datetime.min.time())
-    end_datetime = datetime.combine(target_date, datetime.max.time())
-    
-    readings = db.query(SensorReading).filter(
-        SensorReading.timestamp >= start_datetime,
-        SensorReading.timestamp <= end_datetime
-    ).all()
-    
-    logger.info(f"Found {len(readings)} readings for {target_date}")
-    return readings
+    row = db.execute(_LATEST_READING_SQL).first()
+    if row is None:
+        return None
+    # Values come straight from typed columns, so skip Pydantic validation
+    return SensorReadingResponse.model_construct(**row._mapping)
 
 
 def compute_daily_aggregates(db: Session, target_date: date) -> Optional[dict]:
@@ -78,40 +88,36 @@ def compute_daily_aggregates(db: Session, target_date: date) -> Optional[dict]:
     Returns:
         Dictionary with averages or None if no data
     """
-    start_datetime = datetime.combine(target_date, datetime.min.time())
-    end_datetime = datetime.combine(target_date, datetime.max.time())
-    
-    # SQLAlchemy aggregation query
+    # Single aggregation query over the day's readings
     result = db.query(
         func.avg(SensorReading.ph).label('avg_ph'),
         func.avg(SensorReading.tds).label('avg_tds'),
         func.avg(SensorReading.turbidity).label('avg_turbidity'),
         func.avg(SensorReading.temperature).label('avg_temperature'),
-        func.count(SensorReading.id).label('count')
+        func.count().label('reading_count')
     ).filter(
-        SensorReading.timestamp >= start_datetime,
-        SensorReading.timestamp <= end_datetime
+        func.date(SensorReading.timestamp) == target_date
+    ).group_by(
+        # A day with no readings forms no group, so the query itself
+        # returns no row instead of a separate emptiness check
+        func.date(SensorReading.timestamp)
     ).first()
     
-    if result.count == 0:
-        logger.warning(f"No readings found for {target_date}")
+    if result is None:
+        logger.warning("No readings found for %s", target_date)
         return None
     
-    aggregates = {
-        'avg_ph': float(result.avg_ph),
-        'avg_tds': float(result.avg_tds),
-        'avg_turbidity': float(result.avg_turbidity),
-        'avg_temperature': float(result.avg_temperature),
-        'reading_count': result.count
-    }
+    # Labels already match the keys create_daily_prediction expects, and
+    # AVG over REAL columns comes back as float
+    aggregates = dict(result._mapping)
     
-    logger.info(f"Daily aggregates for {target_date}: {aggregates}")
+    logger.info("Daily aggregates for %s: %s", target_date, aggregates)
     return aggregates
 
 
 def create_daily_prediction(db: Session, target_date: date, 
                            aggregates: dict, prediction: str, 
-                           confidence: Optional[float]) -> DailyPrediction:
+                           confidence: Optional[float]) -> DailyPredictionResponse:
     """
     Create or update daily prediction record.
     
@@ -122,51 +128,50 @@ def create_daily_prediction(db: Session, target_date: date,
         confidence: Prediction confidence score
         
     Returns:
-        Created/Updated DailyPrediction object
+        Stored prediction as DailyPredictionResponse
     """
-    # Check if prediction already exists for this date
-    existing = db.query(DailyPrediction).filter(
-        DailyPrediction.date == target_date
-    ).first()
+    values = {
+        'date': target_date,
+        'avg_ph': aggregates['avg_ph'],
+        'avg_tds': aggregates['avg_tds'],
+        'avg_turbidity': aggregates['avg_turbidity'],
+        'avg_temperature': aggregates['avg_temperature'],
+        'prediction': prediction,
+        'prediction_confidence': confidence,
+        'reading_count': aggregates['reading_count'],
+        'created_at': datetime.utcnow()
+    }
+    
+    # Single UPSERT keyed on the unique date instead of select-then-update/insert
+    table = DailyPrediction.__table__
+    stmt = sqlite_insert(table).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.date],
+        set_={key: stmt.excluded[key] for key in values if key != 'date'}
+    )
+    db.execute(stmt)
     
-    if existing:
-        # Update existing prediction
-        existing.avg_ph = aggregates['avg_ph']
-        existing.avg_tds = aggregates['avg_tds']
-        existing.avg_turbidity = aggregates['avg_turbidity']
-        existing.avg_temperature = aggregates['avg_temperature']
-        existing.prediction = prediction
-        existing.prediction_confidence = confidence
-        existing.reading_count = aggregates['reading_count']
-        existing.created_at = datetime.utcnow()
-        db.commit()
-        db.refresh(existing)
-        logger.info(f"Updated daily prediction for {target_date}")
-        return existing
-    else:
-        # Create new prediction
-        db_prediction = DailyPrediction(
-            date=target_date,
-            avg_ph=aggregates['avg_ph'],
-            avg_tds=aggregates['avg_tds'],
-            avg_turbidity=aggregates['avg_turbidity'],
-            avg_temperature=aggregates['avg_temperature'],
-            prediction=prediction,
-            prediction_confidence=confidence,
-            reading_count=aggregates['reading_count']
-        )
-        db.add(db_prediction)
-        db.commit()
-        db.refresh(db_prediction)
-        logger.info(f"Created daily prediction for {target_date}: {prediction}")
-        return db_prediction
-
-
-def get_latest_daily_prediction(db: Session) -> Optional[DailyPrediction]:
+    # Only the id is read back (a unique-index lookup in the same
+    # transaction; RETURNING would need SQLite >= 3.35), and the response
+    # is built from the values we wrote. Nothing is left in the session to
+    # expire, so no reload SELECT happens after the commit.
+    prediction_id = db.execute(
+        select(table.c.id).where(table.c.date == target_date)
+    ).scalar_one()
+    db.commit()
+    _bump_data_generation()
+    logger.info("Stored daily prediction for %s: %s", target_date, prediction)
+    return DailyPredictionResponse.model_construct(id=prediction_id, **values)
+
+
+def get_latest_daily_prediction(db: Session) -> Optional[DailyPredictionResponse]:
     """
     Get the most recent daily prediction.
     
     Returns:
-        Latest DailyPrediction or None
+        Latest prediction as DailyPredictionResponse or None
     """
-    return db.query(DailyPrediction).order_by(DailyPrediction.date.desc()).first()
+    row = db.execute(_LATEST_PREDICTION_SQL).first()
+    if row is None:
+        return None
+    return DailyPredictionResponse.model_construct(**row._mapping)
@@ -0,0 +1,119 @@
+"""
+Compiled Random Forest scoring for single-row predictions.
+The fitted trees are packed once into flat structure-of-arrays buffers,
+and a Numba-compiled loop walks them directly, skipping sklearn's input
+validation and per-tree Python dispatch on every call.
+"""
+import numpy as np
+import logging
+
+# Optional: without numba the sklearn model is used as-is
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+# Marker sklearn uses for "no child" in children_left/children_right
+TREE_LEAF = -1
+
+
+def _score(x, roots, left, right, feature, threshold, value, out):
+    """
+    Average the leaf class probabilities of every tree for one feature row.
+    Mirrors RandomForestClassifier.predict_proba: go left when
+    x[feature] <= threshold, sum per-tree leaf probabilities, divide by
+    the number of trees.
+    """
+    n_classes = out.shape[0]
+    for c in range(n_classes):
+        out[c] = 0.0
+
+    for t in range(roots.shape[0]):
+        node = roots[t]
+        while left[node] != TREE_LEAF:
+            if x[feature[node]] <= threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        for c in range(n_classes):
+            out[c] += value[node, c]
+
+    for c in range(n_classes):
+        out[c] /= roots.shape[0]
+
+
+def _compile_score():
+    """
+    JIT-compile _score, caching the machine code on disk when possible.
+    """
+    if njit is None:
+        return None
+    try:
+        # cache=True stores the compiled code next to this module (or in
+        # ~/.cache/numba), so later processes load it instead of recompiling
+        return njit(cache=True, nogil=True)(_score)
+    except RuntimeError as e:
+        # No writable cache location (read-only image, no HOME): still
+        # compile, just once per process
+        logger.warning("Numba cache unavailable, compiling without it: %s", e)
+        return njit(nogil=True)(_score)
+
+
+_score_compiled = _compile_score()
+
+
+class PackedForest:
+    """
+    All trees of a fitted RandomForestClassifier in contiguous arrays.
+
+    Node i of tree t lives at roots[t] + i; child indices are rewritten to
+    these global positions, and leaf values are normalized to class
+    probabilities exactly as DecisionTreeClassifier.predict_proba does.
+    """
+
+    def __init__(self, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        counts = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        self.roots = offsets.astype(np.int64)
+        self.left = np.concatenate([
+            np.where(tree.children_left == TREE_LEAF, TREE_LEAF, tree.children_left + offset)
+            for tree, offset in zip(trees, offsets)
+        ]).astype(np.int64)
+        self.right = np.concatenate([
+            np.where(tree.children_right == TREE_LEAF, TREE_LEAF, tree.children_right + offset)
+            for tree, offset in zip(trees, offsets)
+        ]).astype(np.int64)
+        self.feature = np.concatenate([tree.feature for tree in trees]).astype(np.int64)
+        self.threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+
+        # value is (n_nodes, n_outputs=1, n_classes); keep the single output
+        value = np.concatenate([tree.value[:, 0, :] for tree in trees]).astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        self.value = np.ascontiguousarray(value / normalizer)
+
+        self.n_classes = self.value.shape[1]
+
+    @staticmethod
+    def supports(model) -> bool:
+        """
+        Whether `model` can be packed: a fitted single-output forest classifier.
+        """
+        return (
+            _score_compiled is not None
+            and hasattr(model, "estimators_")
+            and getattr(model, "n_outputs_", None) == 1
+        )
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for a single (1, n_features) row.
+        """
+        out = np.empty(self.n_classes, dtype=np.float64)
+        _score_compiled(features[0], self.roots, self.left, self.right,
+                        self.feature, self.threshold, self.value, out)
+        return out
@@ -0,0 +1,177 @@
+"""
+Buffered ingestion of ESP32 sensor readings.
+Readings are queued by the API and written to SQLite in batches,
+so many inserts share a single commit instead of paying one each.
+"""
+import asyncio
+import math
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DataError, OperationalError
+from app.database import SessionLocal
+from app.crud import create_sensor_readings
+from app.schemas import SensorReadingCreate
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many readings are queued...
+BATCH_SIZE = 100
+# ...or once the oldest queued reading has waited this long (seconds)
+FLUSH_INTERVAL = 0.5
+# Readings that may wait in memory; beyond this the API answers 503
+MAX_QUEUE_SIZE = 10000
+# Tries per batch when the database itself fails (e.g. locked)
+WRITE_ATTEMPTS = 2
+
+# Queue of pending readings (created in start_ingestion_worker)
+_queue: Optional[asyncio.Queue] = None
+
+
+def enqueue_sensor_reading(reading: SensorReadingCreate) -> datetime:
+    """
+    Queue a sensor reading for the next batch insert.
+
+    The timestamp is taken on receipt, so a reading keeps its arrival
+    time regardless of when the batch is written.
+
+    Returns:
+        Timestamp the reading will be stored with
+        
+    Raises:
+        ValueError: If any sensor value is NaN or infinite
+        asyncio.QueueFull: If MAX_QUEUE_SIZE readings are already waiting
+    """
+    if _queue is None:
+        raise RuntimeError("Ingestion worker not running. Call start_ingestion_worker() first.")
+    
+    # Reject bad values here, while the client can still be told: once
+    # queued, a reading that fails to insert can no longer be reported
+    for field in ('ph', 'tds', 'turbidity', 'temperature'):
+        if not math.isfinite(getattr(reading, field)):
+            raise ValueError(f"{field} must be a finite number")
+
+    timestamp = datetime.utcnow()
+    _queue.put_nowait({
+        'ph': reading.ph,
+        'tds': reading.tds,
+        'turbidity': reading.turbidity,
+        'temperature': reading.temperature,
+        'timestamp': timestamp
+    })
+    return timestamp
+
+
+def _insert_batch(db, batch: List[dict]):
+    """
+    Insert a batch with a single commit, falling back to one row at a time
+    if a row is rejected, so one bad row cannot take the rest down with it.
+    """
+    try:
+        create_sensor_readings(db, batch)
+    except (IntegrityError, DataError) as e:
+        db.rollback()
+        logger.warning("Batch insert of %d sensor readings failed (%s); retrying individually",
+                       len(batch), e)
+        for reading in batch:
+            try:
+                create_sensor_readings(db, [reading])
+            except SQLAlchemyError as row_error:
+                db.rollback()
+                logger.error("Dropped sensor reading %s: %s", reading, row_error)
+
+
+def _write_batch(batch: List[dict]):
+    """
+    Insert one batch of readings.
+    Runs in a worker thread so the event loop is never blocked on disk IO.
+    
+    An OperationalError (database locked, disk full, ...) fails every row
+    alike, so the whole batch is retried once and then dropped.
+    """
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        db = SessionLocal()
+        try:
+            _insert_batch(db, batch)
+            return
+        except OperationalError as e:
+            db.rollback()
+            if attempt < WRITE_ATTEMPTS:
+                logger.warning("Batch insert of %d sensor readings failed (%s); retrying",
+                               len(batch), e)
+            else:
+                logger.error("Dropped batch of %d sensor readings: %s", len(batch), e)
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error("Dropped batch of %d sensor readings: %s", len(batch), e)
+            return
+        finally:
+            db.close()
+
+
+def _drain(queue: asyncio.Queue) -> List[dict]:
+    """Take everything currently waiting in the queue without blocking."""
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+async def _flush_loop(queue: asyncio.Queue):
+    """
+    Collect readings into batches of up to BATCH_SIZE, waiting at most
+    FLUSH_INTERVAL after the first one, and write each batch.
+    """
+    loop = asyncio.get_running_loop()
+    batch = []
+    try:
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + FLUSH_INTERVAL
+
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            pending, batch = batch, []
+            await asyncio.to_thread(_write_batch, pending)
+    except asyncio.CancelledError:
+        # Shutdown: write anything still buffered so accepted readings are kept
+        batch.extend(_drain(queue))
+        if batch:
+            _write_batch(batch)
+        raise
+
+
+def start_ingestion_worker() -> asyncio.Task:
+    """
+    Create the reading queue and start the background flusher.
+    Called once during FastAPI startup.
+    """
+    global _queue
+    _queue = asyncio.Queue(maxsize=MAX_QUEUE_SIZE)
+    task = asyncio.create_task(_flush_loop(_queue))
+    logger.info("Ingestion worker started - batches of up to %d readings every %ss",
+                BATCH_SIZE, FLUSH_INTERVAL)
+    return task
+
+
+async def stop_ingestion_worker(task: asyncio.Task):
+    """
+    Flush pending readings and stop the background flusher.
+    Called during FastAPI shutdown.
+    """
+    global _queue
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        _queue = None
+        logger.info("Ingestion worker stopped")
@@ -4,17 +4,20 @@ Handles:
 - Application startup/shutdown lifecycle
 - ML model loading
 - Background scheduler initialization
+- Batched sensor reading ingestion
 - API endpoints
 """
 from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
+import asyncio
+import itertools
 import logging
+import time
 from pathlib import Path
 
-from app.database import engine, Base, get_db
+from app.database import engine, Base, get_db, create_missing_indexes
 from app.models import SensorReading, DailyPrediction
 from app.schemas import (
     SensorReadingCreate, 
@@ -24,6 +27,12 @@ from app.schemas import (
 )
 from app.ml_service import MLService, ml_service as global_ml_service
 from app.scheduler_service import start_scheduler, stop_scheduler
+from app.ingestion_service import (
+    enqueue_sensor_reading,
+    start_ingestion_worker,
+    stop_ingestion_worker
+)
+from app.static_files import CachedStaticFiles
 from app import crud
 
 # Configure logging
@@ -33,9 +42,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global scheduler instance
+# Log only one in this many successful requests to uvicorn's access log
+ACCESS_LOG_SAMPLE_RATE = 10
+
+
+class SampledAccessLogFilter(logging.Filter):
+    """
+    Sample uvicorn access log records so dashboard polling doesn't flood
+    the log. Error responses (status >= 400) are always logged.
+    """
+
+    def __init__(self, sample_rate: int):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn access args: (client_addr, method, path, http_version, status_code)
+        args = record.args
+        if isinstance(args, tuple) and len(args) == 5 and args[4] >= 400:
+            return True
+        return next(self._counter) % self.sample_rate == 0
+
+
+logging.getLogger("uvicorn.access").addFilter(SampledAccessLogFilter(ACCESS_LOG_SAMPLE_RATE))
+
+# Seconds a dashboard response is reused while no new data has been written
+DASHBOARD_CACHE_TTL = 60
+
+# Last dashboard response, with when it was built and the data generation it reflects
+_dashboard_cache = {"ts": 0.0, "generation": -1, "value": None}
+
+# Daily prediction task (asyncio, runs in the app's event loop)
 scheduler = None
 
+# Background task that batches sensor readings into the database
+ingestion_task = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -49,6 +92,7 @@ async def lifespan(app: FastAPI):
     # 1. Create database tables
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    create_missing_indexes()
     
     # 2. Load ML artifacts
     logger.info("Loading ML artifacts...")
@@ -60,14 +104,21 @@ async def lifespan(app: FastAPI):
     app.state.ml_service.load_artifacts()
     
     # Make ML service globally accessible
-    import app.ml_service
-    app.ml_service.ml_service = app.state.ml_service
+    # (`import app.ml_service` here would rebind the local name `app`
+    # from the FastAPI instance to the package)
+    from app import ml_service as ml_module
+    ml_module.ml_service = app.state.ml_service
     
     # 3. Start background scheduler
     logger.info("Starting background scheduler...")
     global scheduler
     scheduler = start_scheduler()
     
+    # 4. Start batched sensor reading ingestion
+    logger.info("Starting ingestion worker...")
+    global ingestion_task
+    ingestion_task = start_ingestion_worker()
+    
     logger.info("Application startup complete!")
     logger.info("=" * 50)
     
@@ -76,9 +127,13 @@ async def lifespan(app: FastAPI):
     # ========== SHUTDOWN ==========
     logger.info("Shutting down application...")
     
+    # Flush queued readings before anything else goes away
+    if ingestion_task:
+        await stop_ingestion_worker(ingestion_task)
+    
     # Stop scheduler
     if scheduler:
-        stop_scheduler(scheduler)
+        await stop_scheduler(scheduler)
     
     logger.info("Application shutdown complete")
 
@@ -100,10 +155,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for frontend
+# Mount static files for frontend (precompressed variants + Cache-Control)
 static_path = Path("static")
 if static_path.exists():
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.mount("/static", CachedStaticFiles(directory="static", html=True), name="static")
 
 
 # ========== API ENDPOINTS ==========
@@ -123,16 +178,15 @@ async def root():
     }
 
 
-@app.post("/api/readings", response_model=SensorReadingResponse, 
-          status_code=status.HTTP_201_CREATED)
-async def submit_sensor_reading(
-    reading: SensorReadingCreate,
-    db: Session = Depends(get_db)
-):
+@app.post("/api/readings", status_code=status.HTTP_202_ACCEPTED)
+async def submit_sensor_reading(reading: SensorReadingCreate):
     """
     ESP32 endpoint: Submit sensor reading.
     Called every 3 hours by ESP32.
     
+    The reading is queued and written with the next batch, so the
+    response only confirms receipt along with the stored timestamp.
+    
     Example payload:
     {
         "ph": 7.2,
@@ -142,11 +196,25 @@ async def submit_sensor_reading(
     }
     """
     try:
-        db_reading = crud.create_sensor_reading(db, reading)
-        logger.info(f"Received sensor reading from ESP32: ID={db_reading.id}")
-        return db_reading
+        timestamp = enqueue_sensor_reading(reading)
+        logger.info("Received sensor reading from ESP32 at %s", timestamp)
+        return {
+            "message": "Sensor reading accepted",
+            "timestamp": timestamp
+        }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except asyncio.QueueFull:
+        logger.warning("Ingestion queue full, rejecting sensor reading")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingestion queue full, retry later"
+        )
     except Exception as e:
-        logger.error(f"Error saving sensor reading: {e}")
+        logger.error("Error queueing sensor reading: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to save sensor reading"
@@ -188,14 +256,26 @@ async def get_dashboard_data(db: Session = Depends(get_db)):
     """
     Get all data needed for dashboard in single request.
     Returns latest reading + latest prediction.
+    
+    Responses are cached for DASHBOARD_CACHE_TTL seconds; any new reading
+    or prediction written by this process invalidates the cache.
     """
+    generation = crud.get_data_generation()
+    now = time.monotonic()
+    if (_dashboard_cache["value"] is not None
+            and _dashboard_cache["generation"] == generation
+            and now - _dashboard_cache["ts"] < DASHBOARD_CACHE_TTL):
+        return _dashboard_cache["value"]
+    
     latest_reading = crud.get_latest_sensor_reading(db)
     latest_prediction = crud.get_latest_daily_prediction(db)
     
-    return DashboardResponse(
+    response = DashboardResponse(
         latest_reading=latest_reading,
         latest_prediction=latest_prediction
     )
+    _dashboard_cache.update(ts=now, generation=generation, value=response)
+    return response
 
 
 @app.post("/api/predictions/trigger")
@@ -206,10 +286,11 @@ async def trigger_prediction_manually(db: Session = Depends(get_db)):
     """
     from app.scheduler_service import run_daily_prediction
     try:
-        run_daily_prediction()
+        # Blocking DB + ML work: run it off the event loop, as the scheduler does
+        await asyncio.to_thread(run_daily_prediction)
         return {"message": "Daily prediction triggered successfully"}
     except Exception as e:
-        logger.error(f"Error triggering prediction: {e}")
+        logger.error("Error triggering prediction: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -1,57 +1,143 @@
 import joblib
+from functools import lru_cache
 import numpy as np
 from pathlib import Path
-from typing import Tuple
+import threading
+from typing import Optional, Tuple
 import logging
+from app.forest_scorer import PackedForest
+
+# Optional: compiled inference backend (see README "Faster inference with ONNX")
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
 
 logger = logging.getLogger(__name__)
 
+# Number of distinct (quantized) feature tuples kept in the prediction cache
+PREDICTION_CACHE_SIZE = 512
+
 
 class MLService:
     
-    def __init__(self, model_path: str, encoder_path: str):
+    def __init__(self, model_path: str, encoder_path: str,
+                 onnx_path: Optional[str] = None):
         self.model_path = Path(model_path)
         self.encoder_path = Path(encoder_path)
+        # ONNX export of the same model, used instead of sklearn when available
+        self.onnx_path = Path(onnx_path) if onnx_path else self.model_path.with_suffix(".onnx")
         self.model = None
+        self.onnx_session = None
+        # Numba-compiled copy of the forest, used when ONNX is not available
+        self.packed_forest = None
         self.label_encoder = None
+        # Decoded labels aligned with the model's predict_proba columns
+        self.class_labels = None
+        # Reused (1, 4) float32 input row: both sklearn trees and ONNX work in
+        # float32, so neither has to allocate or convert a fresh array per call
+        self._features = np.empty((1, 4), dtype=np.float32)
+        self._features_lock = threading.Lock()
+        # Per-instance cache so it never outlives the loaded model
+        self._predict_cached = lru_cache(maxsize=PREDICTION_CACHE_SIZE)(self._predict_features)
         
     def load_artifacts(self):
         try:
-            logger.info(f"Loading ML model from {self.model_path}")
-            self.model = joblib.load(self.model_path)
+            logger.info("Loading ML model from %s", self.model_path)
+            # mmap_mode only lowers peak RSS while unpickling (large arrays are
+            # paged in rather than read into a buffer first); each tree copies
+            # its nodes into its own memory, so nothing is shared between workers
+            self.model = joblib.load(self.model_path, mmap_mode='r')
             
-            logger.info(f"Loading label encoder from {self.encoder_path}")
+            logger.info("Loading label encoder from %s", self.encoder_path)
             self.label_encoder = joblib.load(self.encoder_path)
+            # Plain str labels: numpy scalars would be bound by sqlite3 as BLOBs
+            self.class_labels = [
+                str(label) for label in self.label_encoder.inverse_transform(self.model.classes_)
+            ]
+            self._predict_cached.cache_clear()
+            
+            self._load_onnx_session()
+            self._load_packed_forest()
             
             logger.info("ML artifacts loaded successfully")
-            logger.info(f"Model type: {type(self.model).__name__}")
-            logger.info(f"Label classes: {self.label_encoder.classes_}")
+            logger.info("Model type: %s", type(self.model).__name__)
+            logger.info("Inference backend: %s", self.backend)
+            logger.info("Label classes: %s", self.label_encoder.classes_)
             
         except Exception as e:
-            logger.error(f"Failed to load ML artifacts: {e}")
+            logger.error("Failed to load ML artifacts: %s", e)
             raise
     
+    def _load_onnx_session(self):
+        self.onnx_session = None
+        if onnxruntime is None or not self.onnx_path.exists():
+            return
+        
+        logger.info("Loading ONNX model from %s", self.onnx_path)
+        self.onnx_session = onnxruntime.InferenceSession(
+            str(self.onnx_path), providers=["CPUExecutionProvider"]
+        )
+        self._onnx_input = self.onnx_session.get_inputs()[0].name
+        
+        # Class columns must line up with the sklearn model's classes_
+        outputs = {o.name: o for o in self.onnx_session.get_outputs()}
+        if "probabilities" not in outputs or outputs["probabilities"].shape[-1] != len(self.model.classes_):
+            logger.warning("ONNX model does not expose a matching 'probabilities' tensor "
+                           "(export with zipmap disabled); ignoring it")
+            self.onnx_session = None
+    
+    def _load_packed_forest(self):
+        self.packed_forest = None
+        if self.onnx_session is not None or not PackedForest.supports(self.model):
+            return
+        
+        logger.info("Packing forest for compiled scoring")
+        self.packed_forest = PackedForest(self.model)
+        # Compile (or load the cached build) now rather than on the first request
+        self.packed_forest.predict_proba(np.zeros((1, self.model.n_features_in_), dtype=np.float32))
+    
+    @property
+    def backend(self) -> str:
+        if self.onnx_session is not None:
+            return "onnxruntime"
+        if self.packed_forest is not None:
+            return "numba"
+        return "sklearn"
+    
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        if self.onnx_session is not None:
+            return self.onnx_session.run(
+                ["probabilities"], {self._onnx_input: features}
+            )[0][0]
+        if self.packed_forest is not None:
+            return self.packed_forest.predict_proba(features)
+        return self.model.predict_proba(features)[0]
+    
     def predict(self, ph: float, tds: float, turbidity: float, 
                 temperature: float) -> Tuple[str, float]:
         if self.model is None or self.label_encoder is None:
             raise RuntimeError("ML artifacts not loaded. Call load_artifacts() first.")
         
-        features = np.array([[ph, tds, turbidity, temperature]])
-        
-        logger.info(f"Making prediction for features: {features}")
-        
-        prediction_encoded = self.model.predict(features)[0]
-        
-        prediction_label = self.label_encoder.inverse_transform([prediction_encoded])[0]
+        # Quantize inputs so near-identical daily averages share a cache entry
+        key = (round(ph, 2), round(tds, 0), round(turbidity, 2), round(temperature, 1))
+        return self._predict_cached(key)
+    
+    def _predict_features(self, key: Tuple[float, float, float, float]) -> Tuple[str, float]:
+        # Scheduler thread and API can predict concurrently; guard the shared buffer
+        with self._features_lock:
+            self._features[0] = key
+            logger.debug("Making prediction for features: %s", self._features)
+            
+            # predict() is argmax over predict_proba(), so one forest pass gives both
+            probabilities = self._predict_proba(self._features)
+        logger.debug("Prediction probabilities: %s", probabilities)
         
-        # Get prediction probability (confidence) if available
-        confidence = None
-        if hasattr(self.model, 'predict_proba'):
-            probabilities = self.model.predict_proba(features)[0]
-            confidence = float(max(probabilities))  # Confidence of predicted class
-            logger.info(f"Prediction probabilities: {probabilities}")
+        idx = int(np.argmax(probabilities))
+        prediction_label = self.class_labels[idx]
+        confidence = float(probabilities[idx])  # Confidence of predicted class
         
-        logger.info(f"Prediction: {prediction_label} (confidence: {confidence})")
+        logger.info("Prediction: %s (confidence: %s)", prediction_label, confidence)
         
         return prediction_label, confidence
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, Date
+from sqlalchemy import Column, Integer, Float, String, DateTime, Date, Index, func
 from datetime import datetime
 from app.database import Base
 
@@ -11,7 +11,13 @@ class SensorReading(Base):
     tds = Column(Float, nullable=False)  
     turbidity = Column(Float, nullable=False)  
     temperature = Column(Float, nullable=False)  
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Not indexed directly: lookups go through id (latest) or date(timestamp) (daily)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Expression index so daily queries are an equality lookup on the day
+        Index("ix_sensor_readings_reading_date", func.date(timestamp)),
+    )
 
     def __repr__(self):
         return f"<SensorReading(id={self.id}, timestamp={self.timestamp})>"
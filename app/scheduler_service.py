@@ -1,13 +1,13 @@
 """
 Background scheduler for daily ML predictions.
-Uses APScheduler to run daily aggregation and prediction task.
+Runs an asyncio task in the application's event loop that wakes at
+midnight and runs the daily aggregation and prediction task.
 """
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from datetime import date, timedelta
+import asyncio
+from datetime import date, datetime, time, timedelta
 from app.database import SessionLocal
 from app.crud import compute_daily_aggregates, create_daily_prediction
-from app.ml_service import ml_service
+import app.ml_service as ml
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,7 +42,8 @@ def run_daily_prediction():
             return
         
         # Step 2: Make ML prediction
-        prediction_label, confidence = ml_service.predict(
+        # Resolved at call time: main.py installs the loaded service during startup
+        prediction_label, confidence = ml.ml_service.predict(
             ph=aggregates['avg_ph'],
             tds=aggregates['avg_tds'],
             turbidity=aggregates['avg_turbidity'],
@@ -73,33 +74,46 @@ def run_daily_prediction():
     logger.info("=" * 50)
 
 
-def start_scheduler():
+def next_midnight(now: datetime) -> datetime:
     """
-    Initialize and start the background scheduler.
+    Get the start of the day after `now` (local time).
+    """
+    return datetime.combine(now.date() + timedelta(days=1), time.min)
+
+
+async def _daily_loop():
+    """
+    Sleep until midnight, run the daily prediction, repeat.
+    """
+    while True:
+        next_run = next_midnight(datetime.now())
+        # Re-check after waking: sleep is monotonic, wall-clock may have shifted
+        while (delay := (next_run - datetime.now()).total_seconds()) > 0:
+            await asyncio.sleep(delay)
+        
+        # DB and model work is blocking, so keep it off the event loop
+        await asyncio.to_thread(run_daily_prediction)
+
+
+def start_scheduler() -> asyncio.Task:
+    """
+    Start the daily prediction task in the running event loop.
     Called once during FastAPI startup.
     """
-    scheduler = BackgroundScheduler()
-    
-    # Schedule daily prediction at midnight (00:00)
-    scheduler.add_job(
-        func=run_daily_prediction,
-        trigger=CronTrigger(hour=0, minute=0),  # Every day at 00:00
-        id='daily_prediction_job',
-        name='Daily Water Quality Prediction',
-        replace_existing=True
-    )
-    
-    scheduler.start()
+    task = asyncio.create_task(_daily_loop(), name='daily_prediction')
     logger.info("Scheduler started - Daily prediction will run at 00:00")
-    
-    return scheduler
+    return task
 
 
-def stop_scheduler(scheduler: BackgroundScheduler):
+async def stop_scheduler(task: asyncio.Task):
     """
-    Gracefully shutdown scheduler.
+    Gracefully stop the daily prediction task.
     Called during FastAPI shutdown.
     """
-    if scheduler:
-        scheduler.shutdown()
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
         logger.info("Scheduler stopped")
@@ -0,0 +1,100 @@
+"""
+Static file serving for the frontend dashboard.
+Adds precompressed (.br / .gz) variants and Cache-Control headers on top
+of Starlette's StaticFiles, which already handles ETag/Last-Modified and
+304 Not Modified responses.
+"""
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+from mimetypes import guess_type
+from typing import Set
+import os
+import stat
+
+
+def _accepted_encodings(accept_encoding: str) -> Set[str]:
+    """
+    Parse an Accept-Encoding header into the set of encodings with q > 0.
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if token.strip():
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that prefers precompressed siblings and sets Cache-Control.
+
+    For a request to `app.js`, `app.js.br` or `app.js.gz` is served instead
+    (with the matching Content-Encoding) when it exists and the client
+    accepts that encoding. Compress assets offline, e.g.
+    `brotli -k -q 11 static/*.js` or `gzip -k -9 static/*.js`.
+    """
+
+    # (Content-Encoding, file suffix) in order of preference
+    encodings = (("br", ".br"), ("gzip", ".gz"))
+
+    def __init__(self, *args, max_age: int = 3600, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+
+    def cache_control(self, media_type: str) -> str:
+        # HTML is the entry point and is not fingerprinted: always revalidate
+        # (a cheap 304 via ETag); other assets may be reused for max_age
+        if media_type == "text/html":
+            return "no-cache"
+        return f"public, max-age={self.max_age}"
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        headers = {
+            "Cache-Control": self.cache_control(media_type),
+            "Vary": "Accept-Encoding",
+        }
+
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in self.encodings:
+            if encoding not in accepted:
+                continue
+            compressed_path = f"{full_path}{suffix}"
+            try:
+                compressed_stat = os.stat(compressed_path)
+            except OSError:
+                continue
+            if stat.S_ISREG(compressed_stat.st_mode):
+                # ETag/Content-Length now describe the compressed file
+                full_path, stat_result = compressed_path, compressed_stat
+                headers["Content-Encoding"] = encoding
+                break
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            method=scope["method"],
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response